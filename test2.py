@@ -1,12 +1,14 @@
-from fastapi import FastAPI, HTTPException
-from pydantic import BaseModel
-from azure.storage.blob import (
-    BlobServiceClient,
-    generate_blob_sas, BlobSasPermissions,
-    generate_container_sas, ContainerSasPermissions
-)
-import requests, asyncio, time, os
-from datetime import datetime, timedelta
+from fastapi import FastAPI, Header, HTTPException, Request, Response
+from fastapi.responses import ORJSONResponse
+from contextlib import asynccontextmanager
+from pydantic import BaseModel, Field
+from azure.storage.blob.aio import BlobServiceClient
+from azure.core.pipeline.transport import AioHttpTransport
+from azure.core.exceptions import HttpResponseError, ResourceNotFoundError
+import redis.asyncio as redis
+import aiohttp, httpx, orjson, asyncio, base64, hashlib, hmac, random, threading, time, uuid, os
+from datetime import datetime, timezone
+from urllib.parse import urlencode
 
 # -------------------------
 # Config
@@ -16,14 +18,152 @@ AZURE_TRANSLATOR_ENDPOINT = os.getenv("AZURE_TRANSLATOR_ENDPOINT")  # e.g. https
 AZURE_STORAGE_ACCOUNT = os.getenv("AZURE_STORAGE_ACCOUNT")
 AZURE_STORAGE_KEY = os.getenv("AZURE_STORAGE_KEY")
 CONTAINER_NAME = "docs"
+REDIS_URL = os.getenv("REDIS_URL", "redis://localhost:6379/0")
+JOB_TTL = 3600  # seconds a job's state is kept in Redis
+TRANSLATOR_REQUEST_DEADLINE = 60  # seconds for one Translator call, retries and Retry-After sleeps included
+POLL_DEADLINE = 90  # seconds a poll may spend waiting for the poll semaphore plus one status call
+# A claimed poll must finish within its lease, or another worker polls the same job concurrently.
+JOB_LEASE = POLL_DEADLINE + 30  # seconds a worker holds a claimed poll before another worker may take it over
+WORKER_ID = uuid.uuid4().hex
+IDEMPOTENCY_TTL = 600  # seconds an Idempotency-Key keeps mapping to its job
+# An Idempotency-Key holds IDEMPOTENCY_PENDING while its first request is being
+# submitted; the shorter TTL frees the key if that worker dies mid-submit.
+IDEMPOTENCY_PENDING = b"pending"
+IDEMPOTENCY_PENDING_TTL = TRANSLATOR_REQUEST_DEADLINE + 30
+TRANSLATOR_POLL_CONCURRENCY = int(os.getenv("TRANSLATOR_POLL_CONCURRENCY", "50"))
+TRANSLATOR_RETRIES = 3
+TRANSLATOR_RETRY_BACKOFF = 0.3  # seconds, doubled on each retry
+# 502/504 may mean the request was processed, so only GETs retry on those.
+RETRY_STATUSES = {"GET": (429, 502, 503, 504), "POST": (429, 503)}
+ERROR_BODY_LIMIT = 4096  # bytes of a Translator error body kept for HTTPException.detail
+TRANSLATOR_CALLBACK_SECRET = os.getenv("TRANSLATOR_CALLBACK_SECRET")  # enables /translator-callback
+CALLBACK_GRACE = 60  # seconds to wait for a callback before polling a job
+# The subscription key is set once on the shared client; only POSTs add a body type.
+_JSON_HEADERS = {"Content-Type": "application/json"}
 
-app = FastAPI()
-blob_service_client = BlobServiceClient(
-    f"https://{AZURE_STORAGE_ACCOUNT}.blob.core.windows.net",
-    credential=AZURE_STORAGE_KEY
-)
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # One pooled HTTP/2 client for every Translator call, so polls reuse
+    # the same TCP/TLS connection instead of handshaking each time.
+    app.state.http = httpx.AsyncClient(
+        base_url=AZURE_TRANSLATOR_ENDPOINT,
+        headers={"Ocp-Apim-Subscription-Key": AZURE_TRANSLATOR_KEY},
+        # Pool sized so a full round of concurrent polls never queues for a
+        # connection; retries only cover failed connects, see translator_request.
+        transport=httpx.AsyncHTTPTransport(
+            http2=True,
+            limits=httpx.Limits(
+                max_keepalive_connections=max(100, TRANSLATOR_POLL_CONCURRENCY),
+                max_connections=max(200, 2 * TRANSLATOR_POLL_CONCURRENCY),
+                keepalive_expiry=60
+            ),
+            retries=TRANSLATOR_RETRIES
+        ),
+        timeout=httpx.Timeout(30, connect=5)
+    )
+    # Job state lives in Redis so any worker can answer /check-status.
+    app.state.redis = redis.Redis.from_url(REDIS_URL)
+    app.state.claim_due_job = app.state.redis.register_script(_CLAIM_DUE_JOB)
+    app.state.save_open_job = app.state.redis.register_script(_SAVE_OPEN_JOB)
+    app.state.release_lease = app.state.redis.register_script(_RELEASE_LEASE)
+    # Storage calls share one tuned aiohttp pool; container/blob clients
+    # derived from the service client reuse its pipeline and connections.
+    app.state.blob_session = aiohttp.ClientSession(
+        connector=aiohttp.TCPConnector(limit=200, limit_per_host=100, keepalive_timeout=60, ttl_dns_cache=300)
+    )
+    app.state.blob = BlobServiceClient(
+        f"https://{AZURE_STORAGE_ACCOUNT}.blob.core.windows.net",
+        credential=AZURE_STORAGE_KEY,
+        transport=AioHttpTransport(session=app.state.blob_session, session_owner=False)
+    )
+    app.state.container = app.state.blob.get_container_client(CONTAINER_NAME)
+    poller = asyncio.create_task(_poll_loop())
+    submitter = asyncio.create_task(_submit_loop())
+    yield
+    submitter.cancel()
+    poller.cancel()
+    for task in list(_background_tasks):
+        task.cancel()
+    await app.state.http.aclose()
+    await app.state.redis.aclose()
+    await app.state.blob.close()
+    await app.state.blob_session.close()
+
+app = FastAPI(lifespan=lifespan, default_response_class=ORJSONResponse)
+
+# The poll schedule lives in Redis so that any worker can pick up a job whose
+# poller died: claiming a due job pushes its score JOB_LEASE into the future,
+# and only a lease that lapses makes it due again.
+POLL_SCHEDULE_KEY = "poll:schedule"  # ZSET job_id -> next poll time (epoch seconds)
+POLL_CLAIM_BATCH = 100  # max due jobs claimed per scheduler pass
+_CLAIM_DUE_JOB = """
+local score = redis.call('ZSCORE', KEYS[1], ARGV[1])
+if score and tonumber(score) <= tonumber(ARGV[2]) then
+    redis.call('ZADD', KEYS[1], ARGV[3], ARGV[1])
+    return 1
+end
+return 0
+"""
+# A job's record only takes non-terminal statuses until someone starts
+# finalizing it (job:{id}:finalizing, a lease) or has finished (job:{id}:finished).
+_SAVE_OPEN_JOB = """
+if redis.call('EXISTS', KEYS[2], KEYS[3]) > 0 then
+    return 0
+end
+redis.call('SET', KEYS[1], ARGV[1], 'EX', ARGV[2])
+return 1
+"""
+_RELEASE_LEASE = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('DEL', KEYS[1])
+end
+return 0
+"""
+_poll_wakeup = asyncio.Event()
+_poll_delay: dict[str, float] = {}  # job_id -> current backoff delay (seconds)
+_poll_sem = asyncio.Semaphore(TRANSLATOR_POLL_CONCURRENCY)  # caps in-flight status GETs
+_background_tasks: set[asyncio.Task] = set()
 
-jobs = {}
+POLL_MIN_DELAY = 1.0
+POLL_MAX_DELAY = 30.0
+POLL_BACKOFF = 1.8
+TERMINAL_STATUSES = ("Succeeded", "Failed", "Cancelled")
+FINISHED_STATUSES = (*TERMINAL_STATUSES, "Error")
+
+_submit_queue: asyncio.Queue = asyncio.Queue()  # (target_languages, Future[job_id])
+SUBMIT_WINDOW = 0.2  # seconds to wait for more /start-translation calls to coalesce
+SUBMIT_MAX_BATCH = 50
+
+BLOB_BATCH_SIZE = 256  # max sub-requests per blob batch call
+SYNC_COPY_LIMIT = 256 * 1024 * 1024  # largest source a requires_sync copy accepts
+COPY_MIN_DELAY = 0.5
+COPY_MAX_DELAY = 10.0
+COPY_TIMEOUT = 600  # seconds before a pending async copy is aborted
+FINALIZE_LEASE = COPY_TIMEOUT + 300  # seconds a worker may spend finalizing a job before another worker retries it
+
+_sas_cache: dict[tuple[str, str], tuple[str, float]] = {}  # (resource, permission) -> (url, expiry epoch)
+# Sync endpoints run in FastAPI's threadpool, so cache access is locked.
+_sas_lock = threading.Lock()
+SAS_REFRESH_MARGIN = 300  # seconds
+SAS_CACHE_SIZE = 1024
+BULK_SAS_THREAD_THRESHOLD = 32  # above this many files, sign off the event loop
+BULK_SAS_MAX_FILES = 500  # larger /request-upload-sas-bulk requests get a 422
+
+# Service SAS signing (version 2020-12-06+ layout): the account key is decoded
+# once and the string-to-sign is a template with only the per-call fields open.
+SAS_VERSION = "2021-08-06"
+_SAS_KEY = base64.b64decode(AZURE_STORAGE_KEY or "")
+_SAS_STRING_TO_SIGN = "\n".join([
+    "{permission}",  # sp
+    "",  # st
+    "{expiry}",  # se
+    f"/blob/{AZURE_STORAGE_ACCOUNT}/{CONTAINER_NAME}{{path}}",  # canonicalized resource
+    "", "", "",  # si, sip, spr
+    SAS_VERSION,  # sv
+    "{resource}",  # sr
+    "", "",  # snapshot time, ses
+    "", "", "", "", "",  # rscc, rscd, rsce, rscl, rsct
+])
 
 # -------------------------
 # Models
@@ -31,52 +171,129 @@ jobs = {}
 class UploadRequest(BaseModel):
     filename: str  # frontend already sends a unique name!
 
+class BulkUploadRequest(BaseModel):
+    filenames: list[str] = Field(max_length=BULK_SAS_MAX_FILES)
+
 class TranslationRequest(BaseModel):
     target_languages: list[str]
 
 # -------------------------
 # Helpers
 # -------------------------
+def _get_cached_sas(key: tuple[str, str]):
+    """Return a cached SAS URL that is still valid for more than SAS_REFRESH_MARGIN."""
+    with _sas_lock:
+        cached = _sas_cache.get(key)
+    if cached is not None and cached[1] - time.time() > SAS_REFRESH_MARGIN:
+        return cached[0]
+    return None
+
+def _put_cached_sas(key: tuple[str, str], url: str, expiry: float):
+    with _sas_lock:
+        if len(_sas_cache) >= SAS_CACHE_SIZE:
+            now = time.time()
+            for stale in [k for k, (_, exp) in _sas_cache.items() if exp - now <= SAS_REFRESH_MARGIN]:
+                del _sas_cache[stale]
+            if len(_sas_cache) >= SAS_CACHE_SIZE:
+                _sas_cache.clear()
+        _sas_cache[key] = (url, expiry)
+
+def _sign_sas(permission: str, expiry: float, blob_name: str = ""):
+    """Build a service SAS token for the container, or for one blob in it."""
+    if not _SAS_KEY:
+        raise RuntimeError("AZURE_STORAGE_KEY is not set; cannot sign SAS tokens")
+    expiry_str = datetime.fromtimestamp(expiry, tz=timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+    resource = "b" if blob_name else "c"
+    string_to_sign = _SAS_STRING_TO_SIGN.format(
+        permission=permission,
+        expiry=expiry_str,
+        path=f"/{blob_name}" if blob_name else "",
+        resource=resource
+    )
+    sig = base64.b64encode(hmac.new(_SAS_KEY, string_to_sign.encode("utf-8"), hashlib.sha256).digest())
+    return urlencode({"sv": SAS_VERSION, "se": expiry_str, "sr": resource, "sp": permission, "sig": sig})
+
 def generate_upload_sas(filename: str, hours_valid=1):
     """Generate SAS for uploading a file with the given name."""
-    expiry = datetime.utcnow() + timedelta(hours=hours_valid)
-    sas_token = generate_blob_sas(
-        account_name=AZURE_STORAGE_ACCOUNT,
-        container_name=CONTAINER_NAME,
-        blob_name=filename,
-        account_key=AZURE_STORAGE_KEY,
-        permission=BlobSasPermissions(write=True, create=True),
-        expiry=expiry
-    )
+    url = _get_cached_sas((filename, "cw"))
+    if url is not None:
+        return url
+    expiry = time.time() + hours_valid * 3600
+    sas_token = _sign_sas("cw", expiry, filename)
     url = f"https://{AZURE_STORAGE_ACCOUNT}.blob.core.windows.net/{CONTAINER_NAME}/{filename}?{sas_token}"
+    _put_cached_sas((filename, "cw"), url, expiry)
     return url
 
 def generate_download_sas(blob_name: str, hours_valid=1):
     """Generate SAS for downloading a file."""
-    expiry = datetime.utcnow() + timedelta(hours=hours_valid)
-    sas_token = generate_blob_sas(
-        account_name=AZURE_STORAGE_ACCOUNT,
-        container_name=CONTAINER_NAME,
-        blob_name=blob_name,
-        account_key=AZURE_STORAGE_KEY,
-        permission=BlobSasPermissions(read=True),
-        expiry=expiry
-    )
-    return f"https://{AZURE_STORAGE_ACCOUNT}.blob.core.windows.net/{CONTAINER_NAME}/{blob_name}?{sas_token}"
+    url = _get_cached_sas((blob_name, "r"))
+    if url is not None:
+        return url
+    expiry = time.time() + hours_valid * 3600
+    sas_token = _sign_sas("r", expiry, blob_name)
+    url = f"https://{AZURE_STORAGE_ACCOUNT}.blob.core.windows.net/{CONTAINER_NAME}/{blob_name}?{sas_token}"
+    _put_cached_sas((blob_name, "r"), url, expiry)
+    return url
 
 def generate_container_sas_url(hours_valid=2):
-    """Generate container SAS for Translator job (read+write)."""
-    expiry = datetime.utcnow() + timedelta(hours=hours_valid)
-    sas_token = generate_container_sas(
-        account_name=AZURE_STORAGE_ACCOUNT,
-        container_name=CONTAINER_NAME,
-        account_key=AZURE_STORAGE_KEY,
-        permission=ContainerSasPermissions(read=True, list=True, write=True, create=True),
-        expiry=expiry
-    )
-    return f"https://{AZURE_STORAGE_ACCOUNT}.blob.core.windows.net/{CONTAINER_NAME}?{sas_token}"
+    """Generate container SAS for Translator job (read+write).
+
+    The URL is reused across jobs until it is within SAS_REFRESH_MARGIN of expiring.
+    """
+    url = _get_cached_sas((CONTAINER_NAME, "rcwl"))
+    if url is not None:
+        return url
+    expiry = time.time() + hours_valid * 3600
+    sas_token = _sign_sas("rcwl", expiry)
+    url = f"https://{AZURE_STORAGE_ACCOUNT}.blob.core.windows.net/{CONTAINER_NAME}?{sas_token}"
+    _put_cached_sas((CONTAINER_NAME, "rcwl"), url, expiry)
+    return url
 
-def submit_translation_job(languages: list[str]):
+async def _error_detail(resp: httpx.Response):
+    """Read at most ERROR_BODY_LIMIT bytes of an error body, preferring the API's error message."""
+    body = b""
+    async for chunk in resp.aiter_bytes():
+        body += chunk
+        if len(body) >= ERROR_BODY_LIMIT:
+            break
+    body = body[:ERROR_BODY_LIMIT]
+    if resp.headers.get("content-type", "").startswith("application/json"):
+        try:
+            return orjson.loads(body)["error"]["message"]
+        except (orjson.JSONDecodeError, KeyError, TypeError):
+            pass
+    return body.decode("utf-8", "replace")
+
+async def translator_request(method: str, url: str, **kwargs):
+    """Send a Translator request; error responses raise HTTPException with a capped detail.
+
+    Throttled or unavailable responses are retried with exponential backoff,
+    honouring Retry-After when Translator sends one. The whole call, retries
+    included, is bounded by TRANSLATOR_REQUEST_DEADLINE.
+    """
+    try:
+        return await asyncio.wait_for(_send_with_retries(method, url, **kwargs), TRANSLATOR_REQUEST_DEADLINE)
+    except asyncio.TimeoutError:
+        raise HTTPException(status_code=504, detail=f"Translator did not answer within {TRANSLATOR_REQUEST_DEADLINE}s")
+
+async def _send_with_retries(method: str, url: str, **kwargs):
+    for attempt in range(TRANSLATOR_RETRIES + 1):
+        resp = await app.state.http.send(app.state.http.build_request(method, url, **kwargs), stream=True)
+        if attempt == TRANSLATOR_RETRIES or resp.status_code not in RETRY_STATUSES.get(method, ()):
+            break
+        await resp.aclose()
+        retry_after = resp.headers.get("Retry-After", "")
+        delay = float(retry_after) if retry_after.isdigit() else TRANSLATOR_RETRY_BACKOFF * 2 ** attempt
+        await asyncio.sleep(min(delay, POLL_MAX_DELAY))
+    try:
+        if resp.is_error:
+            raise HTTPException(status_code=resp.status_code, detail=await _error_detail(resp))
+        await resp.aread()
+    finally:
+        await resp.aclose()
+    return resp
+
+async def submit_translation_job(languages: list[str]):
     """Start translation job using same container for source+target."""
     container_sas_url = generate_container_sas_url()
     payload = {
@@ -90,61 +307,311 @@ def submit_translation_job(languages: list[str]):
             }
         ]
     }
-    headers = {
-        "Ocp-Apim-Subscription-Key": AZURE_TRANSLATOR_KEY,
-        "Content-Type": "application/json"
-    }
-    resp = requests.post(f"{AZURE_TRANSLATOR_ENDPOINT}/batches", json=payload, headers=headers)
-    if resp.status_code != 202:
-        raise HTTPException(status_code=resp.status_code, detail=resp.text)
+    resp = await translator_request(
+        "POST", "/batches", content=orjson.dumps(payload), headers=_JSON_HEADERS
+    )
     return resp.headers["operation-location"].split("/")[-1]
 
-def get_job_status(job_id: str):
-    headers = {"Ocp-Apim-Subscription-Key": AZURE_TRANSLATOR_KEY}
-    resp = requests.get(f"{AZURE_TRANSLATOR_ENDPOINT}/batches/{job_id}", headers=headers)
-    return resp.json()
+async def get_job_status(job_id: str):
+    resp = await translator_request("GET", f"/batches/{job_id}")
+    return orjson.loads(resp.content)
+
+async def get_job_documents(job_id: str):
+    """Fetch the per-document results of a job, following @nextLink pages."""
+    documents = []
+    url = f"/batches/{job_id}/documents"
+    while url:
+        page = orjson.loads((await translator_request("GET", url)).content)
+        documents.extend(page.get("value", []))
+        url = page.get("@nextLink")
+    return documents
+
+async def copy_blob(src_name: str, dest_name: str):
+    """Copy a blob within the container and return once the copy has finished.
 
-def rename_translated_blobs(job_status: dict, prefix="translate_done."):
-    """Rename translated files with language-aware prefix."""
-    container_client = blob_service_client.get_container_client(CONTAINER_NAME)
+    Returns False without copying if the source is gone but the destination
+    exists, i.e. an interrupted finalization already moved this blob.
+    requires_sync makes the service finish the copy before responding, so
+    there is nothing to poll. Sync copies are limited to 256 MiB; larger
+    blobs fall back to an async copy polled with exponential backoff and
+    aborted after COPY_TIMEOUT.
+    """
+    src_url = generate_download_sas(src_name)  # a sync copy needs its own read SAS
+    dest = app.state.container.get_blob_client(dest_name)
+    try:
+        await dest.start_copy_from_url(src_url, requires_sync=True)
+        return True
+    except HttpResponseError:
+        # Only a source too big for a sync copy is worth retrying; auth,
+        # missing-blob and service errors would fail the async copy too.
+        try:
+            src_props = await app.state.container.get_blob_client(src_name).get_blob_properties()
+        except ResourceNotFoundError:
+            if await dest.exists():
+                return False
+            raise
+        if src_props.size <= SYNC_COPY_LIMIT:
+            raise
+    copy = await dest.start_copy_from_url(src_url)
+    copy_status = copy["copy_status"]
+
+    deadline = time.monotonic() + COPY_TIMEOUT
+    delay = COPY_MIN_DELAY
+    while copy_status == "pending":
+        if time.monotonic() >= deadline:
+            await dest.abort_copy(copy["copy_id"])
+            raise TimeoutError(f"Copying {src_name} to {dest_name} did not finish within {COPY_TIMEOUT}s")
+        await asyncio.sleep(delay)
+        delay = min(delay * 2, COPY_MAX_DELAY)
+        copy_status = (await dest.get_blob_properties()).copy.status
+    if copy_status != "success":
+        raise RuntimeError(f"Copying {src_name} to {dest_name} ended with status {copy_status}")
+    return True
+
+async def rename_translated_blobs(job_status: dict, prefix="translate_done."):
+    """Rename translated files with language-aware prefix.
+
+    The exact blob paths come from the job's documents manifest, so the
+    container is never listed.
+    """
+    container_client = app.state.container
+    documents = job_status.get("documents") or await get_job_documents(job_status["id"])
     renamed = []
-    for doc in job_status.get("documents", []):
+    for doc in documents:
         if doc.get("status") != "Succeeded":
             continue
         lang = doc.get("to")
         translated_path = doc.get("path").split("/")[-1]  # blob name
         original_name = doc.get("sourcePath").split("/")[-1]
         new_name = f"{lang}.{prefix}{original_name}"
+        renamed.append({"old": translated_path, "new": new_name, "lang": lang, "download": f"/download/{new_name}"})
 
-        src_url = f"https://{AZURE_STORAGE_ACCOUNT}.blob.core.windows.net/{CONTAINER_NAME}/{translated_path}"
-        dest_blob = container_client.get_blob_client(new_name)
-        dest_blob.start_copy_from_url(src_url)
+    # Let every copy finish; a failed copy keeps its source blob and is
+    # reported on its entry instead of a download link.
+    results = await asyncio.gather(*(copy_blob(item["old"], item["new"]) for item in renamed), return_exceptions=True)
+    for item, result in zip(renamed, results):
+        if isinstance(result, Exception):
+            del item["download"]
+            item["error"] = str(result) or type(result).__name__
+    old_names = [item["old"] for item, copied in zip(renamed, results) if copied is True]
+    for i in range(0, len(old_names), BLOB_BATCH_SIZE):
+        await container_client.delete_blobs(*old_names[i:i + BLOB_BATCH_SIZE])
+    return renamed
 
-        while True:
-            props = dest_blob.get_blob_properties()
-            if props.copy.status == "success":
-                break
-            time.sleep(0.5)
+async def load_job(job_id: str):
+    raw = await app.state.redis.get(f"job:{job_id}")
+    return orjson.loads(raw) if raw is not None else None
 
-        container_client.get_blob_client(translated_path).delete_blob()
-        renamed.append({"old": translated_path, "new": new_name, "lang": lang})
-    return renamed
+async def save_job(job_id: str, job: dict):
+    await app.state.redis.set(f"job:{job_id}", orjson.dumps(job), ex=JOB_TTL)
+
+async def save_open_job(job_id: str, job: dict):
+    """Save a job that is still running; a no-op once the job is being finalized."""
+    keys = [f"job:{job_id}", f"job:{job_id}:finalizing", f"job:{job_id}:finished"]
+    return await app.state.save_open_job(keys=keys, args=[orjson.dumps(job), JOB_TTL])
+
+async def schedule_poll(job_id: str, delay: float = 0.0):
+    await app.state.redis.zadd(POLL_SCHEDULE_KEY, {job_id: time.time() + delay})
+
+async def _claim_due_jobs():
+    """Lease due jobs to this worker; returns the job_ids it won."""
+    now = time.time()
+    due = await app.state.redis.zrangebyscore(POLL_SCHEDULE_KEY, "-inf", now, start=0, num=POLL_CLAIM_BATCH)
+    claimed = []
+    for job_id in due:
+        if await app.state.claim_due_job(keys=[POLL_SCHEDULE_KEY], args=[job_id, now, now + JOB_LEASE]):
+            claimed.append(job_id.decode())
+    return claimed
+
+def _job_progress(status: dict):
+    summary = status.get("summary") or {}
+    return summary.get("success", 0) + summary.get("failed", 0)
+
+async def record_job_status(job_id: str, job: dict, status: dict):
+    """Store a Translator status document on a job.
+
+    Returns True once the job's finished record is stored, and False while it
+    is still running or another worker is finalizing it.
+    """
+    job["status"] = status.get("status")
+    job["raw_status"] = status
+    if status.get("status") not in TERMINAL_STATUSES:
+        await save_open_job(job_id, job)
+        return False
+
+    # The poller and a callback can both see the terminal status; whoever
+    # takes the finalizing lease finalizes the job. The permanent finished
+    # marker is only set after the record is saved, so if the finalizer dies
+    # its lease lapses and a later poll finalizes the job instead.
+    finished_key = f"job:{job_id}:finished"
+    lease_key = f"job:{job_id}:finalizing"
+    if await app.state.redis.exists(finished_key):
+        return True
+    if not await app.state.redis.set(lease_key, WORKER_ID, nx=True, ex=FINALIZE_LEASE):
+        return False
+    try:
+        if await app.state.redis.exists(finished_key):  # finished while we took the lease
+            return True
+        if status.get("status") == "Succeeded":
+            try:
+                job["renamed"] = await rename_translated_blobs(status, "translate_done.")
+                failed = [item["old"] for item in job["renamed"] if "error" in item]
+                if failed:
+                    job["status"] = "Error"
+                    job["error"] = f"Could not rename {len(failed)} of {len(job['renamed'])} translated files"
+            except Exception as exc:
+                job["status"] = "Error"
+                job["error"] = str(exc)
+        await save_job(job_id, job)
+        await app.state.redis.set(finished_key, WORKER_ID, ex=JOB_TTL)
+    finally:
+        await app.state.release_lease(keys=[lease_key], args=[WORKER_ID])
+    return True
+
+async def _locked_job_status(job_id: str):
+    async with _poll_sem:
+        return await get_job_status(job_id)
 
 async def poll_translation_job(job_id: str):
+    """Poll a job once and record its status.
+
+    Returns the delay in seconds before the next poll, or None once the job is finished.
+    """
+    job = await load_job(job_id) or {"status": "Running"}
+    if job["status"] in FINISHED_STATUSES:  # already settled by a callback
+        _poll_delay.pop(job_id, None)
+        return None
+    previous = job.get("raw_status")
     try:
-        while True:
-            status = await asyncio.to_thread(get_job_status, job_id)
-            jobs[job_id]["status"] = status.get("status")
-            jobs[job_id]["raw_status"] = status
-            if status.get("status") in ("Succeeded", "Failed", "Cancelled"):
-                if status.get("status") == "Succeeded":
-                    renamed = await asyncio.to_thread(rename_translated_blobs, status, "translate_done.")
-                    jobs[job_id]["renamed"] = renamed
-                break
-            await asyncio.sleep(5)
+        status = await asyncio.wait_for(_locked_job_status(job_id), POLL_DEADLINE)
+    except asyncio.TimeoutError:
+        return POLL_MAX_DELAY  # the semaphore or Translator is backed up; poll again later
     except Exception as exc:
-        jobs[job_id]["status"] = "Error"
-        jobs[job_id]["error"] = str(exc)
+        if isinstance(exc, HTTPException) and exc.status_code in RETRY_STATUSES["GET"]:
+            return POLL_MAX_DELAY  # still throttled or unavailable after retries; the job itself is fine
+        job["status"] = "Error"
+        job["error"] = str(exc)
+        if not await save_open_job(job_id, job):
+            return POLL_MAX_DELAY  # being finalized; keep polling until its record is stored
+        _poll_delay.pop(job_id, None)
+        return None
+    # Redis errors propagate: the job stays scheduled and is polled again once its lease lapses.
+    if await record_job_status(job_id, job, status):
+        _poll_delay.pop(job_id, None)
+        return None
+
+    # Exponential backoff, reset whenever documents complete; jitter spreads
+    # out jobs that were started together.
+    delay = _poll_delay.get(job_id, POLL_MIN_DELAY)
+    if previous is not None and _job_progress(status) > _job_progress(previous):
+        delay = POLL_MIN_DELAY
+    _poll_delay[job_id] = min(delay * POLL_BACKOFF, POLL_MAX_DELAY)
+    return delay * random.uniform(0.8, 1.2)
+
+def _spawn(coro):
+    """Run coro as a background task, holding a reference until it finishes."""
+    task = asyncio.create_task(coro)
+    _background_tasks.add(task)
+    task.add_done_callback(_background_tasks.discard)
+    return task
+
+async def _poll_and_reschedule(job_id: str):
+    try:
+        delay = await poll_translation_job(job_id)
+        if delay is None:
+            await app.state.redis.zrem(POLL_SCHEDULE_KEY, job_id)
+        else:
+            await schedule_poll(job_id, delay)
+            _poll_wakeup.set()
+    except Exception:
+        pass  # Redis hiccup; the lease lapses after JOB_LEASE and the job is polled again
+
+async def _apply_callback(job_id: str, job: dict, status: dict):
+    if await record_job_status(job_id, job, status):
+        await app.state.redis.zrem(POLL_SCHEDULE_KEY, job_id)
+        _poll_delay.pop(job_id, None)
+
+async def _poll_loop():
+    """Claim due jobs from the Redis poll schedule and poll each in its own task.
+
+    A slow poll or a long post-success rename never holds up the other jobs.
+    The loop wakes for the next due job, when this worker submits a job, and
+    at least every POLL_MAX_DELAY to see jobs scheduled by other workers.
+    """
+    while True:
+        _poll_wakeup.clear()
+        try:
+            for job_id in await _claim_due_jobs():
+                _spawn(_poll_and_reschedule(job_id))
+            head = await app.state.redis.zrange(POLL_SCHEDULE_KEY, 0, 0, withscores=True)
+        except redis.RedisError:
+            head = []
+        timeout = min(max(head[0][1] - time.time(), 0.1), POLL_MAX_DELAY) if head else POLL_MAX_DELAY
+        try:
+            await asyncio.wait_for(_poll_wakeup.wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+
+async def _start_job(languages: list[str]):
+    job_id = await submit_translation_job(languages)
+    # The job now exists in Translator, so get it on the schedule before
+    # anything else: a scheduled job is polled (and its record written by
+    # that poll) even if saving the initial record fails.
+    # With callbacks enabled the poller is only a safety net for jobs
+    # that have not reported back within CALLBACK_GRACE.
+    try:
+        await schedule_poll(job_id, CALLBACK_GRACE if TRANSLATOR_CALLBACK_SECRET else 0)
+    except redis.RedisError as exc:
+        raise HTTPException(status_code=503, detail=f"Translation job {job_id} was started but could not be scheduled: {exc}")
+    _poll_wakeup.set()
+    try:
+        await save_job(job_id, {"status": "Running"})
+    except redis.RedisError:
+        pass  # the first poll writes the record
+    return job_id
+
+async def _submit_loop():
+    """Coalesce /start-translation calls arriving within SUBMIT_WINDOW into one Translator job.
+
+    Every request shares the same source/target container, so the batch is
+    submitted as a single input targeting the union of the requested languages
+    and all callers get the same job_id. If Translator rejects the merged
+    request as invalid, each caller is resubmitted on its own so one bad
+    language code only fails the request that sent it.
+    """
+    while True:
+        batch = [await _submit_queue.get()]
+        deadline = time.monotonic() + SUBMIT_WINDOW
+        while len(batch) < SUBMIT_MAX_BATCH:
+            timeout = deadline - time.monotonic()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(_submit_queue.get(), timeout))
+            except asyncio.TimeoutError:
+                break
+
+        languages = list(dict.fromkeys(lang for langs, _ in batch for lang in langs))
+        try:
+            job_id = await _start_job(languages)
+            results = [job_id] * len(batch)
+        except HTTPException as exc:
+            if len(batch) == 1 or exc.status_code not in (400, 422):
+                results = [exc] * len(batch)
+            else:
+                results = await asyncio.gather(
+                    *(_start_job(langs) for langs, _ in batch), return_exceptions=True
+                )
+        except Exception as exc:
+            results = [exc] * len(batch)
+
+        for (_, future), result in zip(batch, results):
+            if future.done():
+                continue
+            if isinstance(result, BaseException):
+                future.set_exception(result)
+            else:
+                future.set_result(result)
 
 # -------------------------
 # API Endpoints
@@ -154,16 +621,100 @@ def request_upload_sas(req: UploadRequest):
     sas_url = generate_upload_sas(req.filename)
     return {"upload_url": sas_url}
 
-@app.post("/start-translation")
-async def start_translation(req: TranslationRequest):
-    job_id = submit_translation_job(req.target_languages)
-    jobs[job_id] = {"status": "Running"}
-    asyncio.create_task(poll_translation_job(job_id))
-    return {"job_id": job_id}
+@app.post("/request-upload-sas-bulk")
+async def request_upload_sas_bulk(req: BulkUploadRequest):
+    if len(req.filenames) > BULK_SAS_THREAD_THRESHOLD:
+        urls = await asyncio.to_thread(lambda: [generate_upload_sas(f) for f in req.filenames])
+    else:
+        urls = [generate_upload_sas(f) for f in req.filenames]
+    return {"urls": urls}
+
+def _accepted(job_id: str):
+    """202 Accepted pointing the client at the job's status resource."""
+    return Response(
+        status_code=202,
+        headers={"Location": f"/check-status/{job_id}", "Retry-After": "5"},
+        content=orjson.dumps({"job_id": job_id}),
+        media_type="application/json"
+    )
+
+async def _submit(languages: list[str]):
+    future = asyncio.get_running_loop().create_future()
+    await _submit_queue.put((languages, future))
+    return await future
+
+async def _reserve_idempotency_key(key: str):
+    """Reserve an Idempotency-Key for this request.
+
+    Returns None if this request now owns the key, or the job_id of an
+    earlier request with the same key, waiting while that one is still
+    being submitted.
+    """
+    while True:
+        if await app.state.redis.set(key, IDEMPOTENCY_PENDING, nx=True, ex=IDEMPOTENCY_PENDING_TTL):
+            return None
+        seen = await app.state.redis.get(key)
+        if seen is not None and seen != IDEMPOTENCY_PENDING:
+            return seen.decode()
+        await asyncio.sleep(0.1)  # pending, or released by a failed submit and free to take next round
+
+async def _submit_reserved(key: str, languages: list[str]):
+    try:
+        job_id = await _submit(languages)
+    except BaseException:
+        await app.state.redis.delete(key)  # let a retry with the same key submit again
+        raise
+    await app.state.redis.set(key, job_id, ex=IDEMPOTENCY_TTL)
+    return job_id
+
+@app.post("/start-translation", status_code=202)
+async def start_translation(req: TranslationRequest, idempotency_key: str | None = Header(default=None)):
+    if not idempotency_key:
+        return _accepted(await _submit(req.target_languages))
+
+    key = f"idem:{idempotency_key}"
+    seen = await _reserve_idempotency_key(key)
+    if seen is not None:
+        return _accepted(seen)
+    # Submit in its own task so the key gets its job_id even if this client disconnects.
+    return _accepted(await asyncio.shield(_spawn(_submit_reserved(key, req.target_languages))))
+
+@app.post("/translator-callback/{job_id}")
+async def translator_callback(job_id: str, request: Request):
+    """Receive a job status notification relayed from Translator.
+
+    The body is the batch status document and X-Signature is its hex
+    HMAC-SHA256 under TRANSLATOR_CALLBACK_SECRET.
+    """
+    if not TRANSLATOR_CALLBACK_SECRET:
+        raise HTTPException(status_code=404, detail="Callbacks are not enabled")
+    body = await request.body()
+    expected = hmac.new(TRANSLATOR_CALLBACK_SECRET.encode(), body, hashlib.sha256).hexdigest()
+    if not hmac.compare_digest(expected.encode(), request.headers.get("X-Signature", "").encode()):
+        raise HTTPException(status_code=401, detail="Invalid signature")
+    try:
+        status = orjson.loads(body)
+    except orjson.JSONDecodeError:
+        raise HTTPException(status_code=400, detail="Body is not JSON")
+    # The signature only covers the body, so tie it to the job in the URL.
+    if not isinstance(status, dict) or status.get("id") != job_id:
+        raise HTTPException(status_code=400, detail="Notification is not for this job_id")
+
+    job = await load_job(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Unknown job_id")
+    if job["status"] not in FINISHED_STATUSES:
+        # Finalizing can rename many blobs; acknowledge now and finish in the background.
+        _spawn(_apply_callback(job_id, job, status))
+    return Response(status_code=202)
 
 @app.get("/check-status/{job_id}")
-def check_status(job_id: str):
-    return jobs.get(job_id, {"status": "Unknown job_id"})
+async def check_status(job_id: str):
+    # Job state is already stored as JSON; hand it back without re-encoding.
+    raw = await app.state.redis.get(f"job:{job_id}")
+    if raw is None:
+        return {"status": "Unknown job_id"}
+    return Response(content=raw, media_type="application/json")
 
 @app.get("/download/{blob_name}")
 def download_file(blob_name: str):